@@ -0,0 +1,296 @@
+# Numba-compiled breadth-first search specialized for the NYT Digits puzzle.
+# Requires numba (and numpy); nothing else in this package does.
+#
+# A puzzle state is a 1-D int64 array:
+#     state[0]    -- n, the number of sources
+#     state[1]    -- the forced operand: NO_FORCED, CHAIN_START, or the value
+#     state[2:]   -- the n sources, in descending order (extra slots unused)
+#
+# A move is an int64 row (op, a, b) where op indexes OPS.
+
+import operator
+
+import numpy as np
+from numba import njit
+
+from nytdigits import DigitsPuzzle
+from puzzlesolver import PuzzleSolver
+
+
+OPS = (operator.add, operator.sub, operator.mul, operator.floordiv)
+_OP_ADD, _OP_SUB, _OP_MUL, _OP_DIV = range(len(OPS))
+
+NO_FORCED = -1            # forced_operand None
+CHAIN_START = 0           # forced_operand DigitsPuzzle.CHAINMODE
+
+
+@njit(cache=True)
+def _mix(v):
+    """splitmix64 finalizer; a per-value pseudo-random 64-bit value."""
+    z = np.uint64(v) + np.uint64(0x9E3779B97F4A7C15)
+    z = (z ^ (z >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+    z = (z ^ (z >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+    return z ^ (z >> np.uint64(31))
+
+
+@njit(cache=True)
+def canonical(state):
+    """Return a uint64 hash of the state.
+
+    The sources contribute the SUM of a (pseudo) random value per source;
+    a sum (not XOR) so that duplicated values do not cancel each other.
+    """
+    h = np.uint64(0)
+    for i in range(state[0]):
+        h += _mix(state[2 + i])
+    return h ^ _mix(state[1] ^ 0x5A5A5A5A)
+
+
+@njit(cache=True)
+def _child(state, i, j, rslt, out):
+    """Write into out the state with sources i and j replaced by rslt."""
+    n = state[0]
+    k = 2
+    placed = False
+    for x in range(n):
+        if x == i or x == j:
+            continue
+        v = state[2 + x]
+        if not placed and rslt >= v:
+            out[k] = rslt
+            k += 1
+            placed = True
+        out[k] = v
+        k += 1
+    if not placed:
+        out[k] = rslt
+    out[0] = n - 1
+    if state[1] == NO_FORCED:
+        out[1] = NO_FORCED
+    else:
+        out[1] = rslt
+
+
+@njit(cache=True)
+def expand(state, out_children, out_moves):
+    """Fill in all the legal moves and resulting states; return the count.
+
+    The same moves, in the same order, as DigitsPuzzle.legalmoves().
+    The output arrays must have at least 2*n*(n-1) rows.
+    """
+    n = state[0]
+    forced = state[1]
+
+    # the index of (one) forced operand in the sources, if any
+    fi = -1
+    if forced > 0:
+        for x in range(n):
+            if state[2 + x] == forced:
+                fi = x
+                break
+
+    count = 0
+    for op in range(4):
+        for i in range(n):
+            if fi >= 0 and i != fi:
+                continue
+            for j in range(n):
+                if fi >= 0:
+                    if j == fi:
+                        continue
+                elif j <= i:
+                    continue
+                a = state[2 + i]
+                b = state[2 + j]
+                if op == _OP_ADD:
+                    rslt = a + b
+                elif op == _OP_SUB:
+                    if a <= b:
+                        continue
+                    rslt = a - b
+                elif op == _OP_MUL:
+                    if b == 1:
+                        continue
+                    rslt = a * b
+                else:
+                    if b == 1 or (a % b) != 0:
+                        continue
+                    rslt = a // b
+                _child(state, i, j, rslt, out_children[count])
+                out_moves[count, 0] = op
+                out_moves[count, 1] = a
+                out_moves[count, 2] = b
+                count += 1
+    return count
+
+
+@njit(cache=True)
+def _isend(state, target):
+    for i in range(state[0]):
+        if state[2 + i] == target:
+            return True
+    return False
+
+
+@njit(cache=True)
+def _bfs(target, start):
+    """Breadth-first search from start. Returns (trail, iterations, maxq).
+
+    The trail is an (m, 3) array of moves; it is empty if no solution.
+    Every queued state is kept, with the index of its parent state and the
+    move that produced it, so the trail is only built once at the end.
+    """
+    width = start.shape[0]
+    n0 = start[0]
+    maxmoves = max(1, 2 * n0 * (n0 - 1))
+    children = np.empty((maxmoves, width), np.int64)
+    cmoves = np.empty((maxmoves, 3), np.int64)
+
+    cap = 1024
+    states = np.empty((cap, width), np.int64)
+    parents = np.empty(cap, np.int64)
+    moves = np.empty((cap, 3), np.int64)
+    states[0] = start
+    parents[0] = -1
+    count = 1
+
+    visited = set()
+    visited.add(canonical(start))
+
+    head = 0
+    maxq = 0
+    iterations = 0
+    while head < count:
+        iterations += 1
+        nc = expand(states[head], children, cmoves)
+        for k in range(nc):
+            zstate = canonical(children[k])
+            if zstate in visited:
+                continue
+            if count == cap:
+                cap *= 2
+                ns = np.empty((cap, width), np.int64)
+                ns[:count] = states
+                states = ns
+                npar = np.empty(cap, np.int64)
+                npar[:count] = parents
+                parents = npar
+                nm = np.empty((cap, 3), np.int64)
+                nm[:count] = moves
+                moves = nm
+            states[count] = children[k]
+            parents[count] = head
+            moves[count] = cmoves[k]
+            count += 1
+            if _isend(children[k], target):
+                depth = 0
+                x = count - 1
+                while x > 0:
+                    depth += 1
+                    x = parents[x]
+                trail = np.empty((depth, 3), np.int64)
+                x = count - 1
+                while x > 0:
+                    depth -= 1
+                    trail[depth] = moves[x]
+                    x = parents[x]
+                return trail, iterations, maxq
+            visited.add(zstate)
+            maxq = max(maxq, count - head - 1)
+        head += 1
+    return np.empty((0, 3), np.int64), iterations, maxq
+
+
+def encode(puzzle):
+    """Return the int64 state array for a DigitsPuzzle."""
+    n = len(puzzle.sources)
+    state = np.zeros(n + 2, np.int64)
+    state[0] = n
+    # NOTE: the sentinel comes from the puzzle's own class, which is not
+    #       this module's DigitsPuzzle when nytdigits.py is run as __main__
+    if puzzle.forced_operand is None:
+        state[1] = NO_FORCED
+    elif puzzle.forced_operand is type(puzzle).CHAINMODE:
+        state[1] = CHAIN_START
+    else:
+        state[1] = puzzle.forced_operand
+    state[2:] = sorted(puzzle.sources, reverse=True)
+    return state
+
+
+class DigitsSolver:
+    """Drop-in replacement for PuzzleSolver, for DigitsPuzzle objects only.
+
+       ds = DigitsSolver()
+
+       ds.solve(puzzle) - return a move sequence, or None, to solve puzzle.
+       ds.stats         - miscellaneous statistics, only valid after solve()
+
+    Only the first ("best") solution is available; i.e., n must be 1.
+    All values arising in the puzzle must fit in an int64.
+
+    NOTE: the first call will compile the search (cached to disk thereafter).
+    """
+
+    def solve(self, puzzle, n=1):
+        if n != 1:
+            raise ValueError(f"DigitsSolver only finds one solution (n={n})")
+
+        trail, self._iterations, self._maxq = _bfs(puzzle.target,
+                                                   encode(puzzle))
+        if len(trail) == 0:
+            return None
+        return [(OPS[op], (int(a), int(b))) for op, a, b in trail]
+
+    @property
+    def stats(self):
+        """miscellaneous statistics attribute."""
+        d = {s: getattr(self, '_' + s, 0) for s in ('maxq', 'iterations')}
+        return PuzzleSolver.STATS(**d)
+
+
+if __name__ == "__main__":
+    import os
+    import sys
+    import random
+    import unittest
+    import subprocess
+
+    class TestMethods(unittest.TestCase):
+        def test1(self):
+            # compare against the generic solver on a bunch of
+            # random puzzles; solutions must be just as short and valid.
+            rng = random.Random(1)
+            ps = PuzzleSolver()
+            ds = DigitsSolver()
+            for _ in range(25):
+                target = rng.randrange(50, 450)
+                sources = rng.sample(range(1, 26), 6)
+                fo = rng.choice((None, DigitsPuzzle.CHAINMODE))
+                with self.subTest(target=target, sources=sources, fo=fo):
+                    s1 = ps.solve(DigitsPuzzle(target, *sources,
+                                               forced_operand=fo))
+                    d = DigitsPuzzle(target, *sources, forced_operand=fo)
+                    s2 = ds.solve(d)
+                    if s1 is None:
+                        self.assertIsNone(s2)
+                        continue
+                    self.assertEqual(len(s1), len(s2))
+                    for m in s2:
+                        self.assertTrue(m in d.legalmoves())
+                        d.move(m)
+                    self.assertTrue(d.endstate)
+
+        def test2(self):
+            # the command line's puzzles are from nytdigits running as
+            # __main__, so their CHAINMODE is not our DigitsPuzzle's.
+            here = os.path.dirname(os.path.abspath(__file__))
+            cmd = [sys.executable, os.path.join(here, 'nytdigits.py'),
+                   '-j', '-c', '123', '5', '9', '10', '14', '19', '21']
+            r = subprocess.run(cmd, capture_output=True, text=True, cwd=here)
+            self.assertEqual(r.returncode, 0, r.stderr)
+            lines = r.stdout.splitlines()
+            self.assertEqual(len(lines), 4)          # three moves + stats
+            self.assertTrue(lines[-1].startswith('PuzzleStatistics'))
+
+    unittest.main()
@@ -22,20 +22,112 @@
 
 # For use with puzzlesolver.py, this models the NYT Digits puzzle
 
+import bisect
 import operator
 import itertools
 
 
+# Bound once here (rather than looked up as operator.xxx and
+# DigitsPuzzle.xxx on every use) because they are used in hot paths.
+_ADD = operator.add
+_SUB = operator.sub
+_MUL = operator.mul
+_DIV = operator.floordiv
+
+_CHAINMODE = object()                       # see DigitsPuzzle.CHAINMODE
+
+
+# canonicalstate() packs the sources, and the forced operand, into a single
+# integer with this many bits per value. Any state with a value that does
+# not fit falls back to a tuple (which can never compare equal to an int).
+_PACKBITS = 10
+_PACKLIMIT = 1 << _PACKBITS
+_PACK_CHAIN = 1 << _PACKBITS                # forced_operand is CHAINMODE
+_PACK_FORCED = 2 << _PACKBITS               # forced_operand is a value
+
+
+def _remove(sources, x):
+    """Remove (one) x from sorted list sources. ValueError if not there."""
+    i = bisect.bisect_left(sources, x)
+    if i == len(sources) or sources[i] != x:
+        raise ValueError(f"{x} is not in sources")
+    del sources[i]
+
+
+def _legal_moves_impl(pairs):
+    """Return a list of all legal moves. A move is a tuple (op, (a, b)).
+
+    pairs are the (a, b) operand pairs from DigitsPuzzle._sourcecombos.
+    The moves are ordered by operation: all the adds, then all the
+    subtracts, etc.
+    """
+
+    # The pairs are (a, b) where either:
+    #     a >= b
+    # OR  a is a "forced operand" and must be the first operand.
+    #
+    # Thus, operand "b" is as small as it *CAN* be, which simplifies
+    # some of the operation filter tests.
+    #
+    # All four operations are generated in a single pass over the pairs.
+    adds = []
+    subs = []
+    muls = []
+    divs = []
+    for ab in pairs:
+        a, b = ab
+
+        # ADD: all operations are legal - no filtering at all.
+        adds.append((_ADD, ab))
+
+        # SUB: Do not allow negative (duh) or zero.
+        if a > b:
+            subs.append((_SUB, ab))
+
+        # MUL: Filter out 1 as a minor optimization (search reduction).
+        #      NOTE: Allows 'a' to be 1 if it was the forced operand.
+        # DIV: Has to be evenly divisible and optimize out divide-by-1
+        #      (which is why it can piggyback on the MUL b != 1 test)
+        if b != 1:
+            muls.append((_MUL, ab))
+            if (a % b) == 0:
+                divs.append((_DIV, ab))
+
+    return adds + subs + muls + divs
+
+
+def _statekey(sources, f):
+    """The canonicalstate() for (sorted) sources and forced_operand f."""
+
+    # NOTE: sources are sorted so [-1] is the biggest. forced_operand
+    #       (if it is a value) is in sources so it fits too.
+    if sources[-1] >= _PACKLIMIT:
+        return tuple(sources) + (f,)
+
+    k = 0
+    for v in sources:
+        k = (k << _PACKBITS) | v
+    k <<= 2 * _PACKBITS
+    if f is _CHAINMODE:
+        k |= _PACK_CHAIN
+    elif f is not None:
+        k |= _PACK_FORCED | f
+    return k
+
+
 class DigitsPuzzle:
 
-    CHAINMODE = object()                       # sentinel for forced_operand
+    # the solver creates (and queues) a LOT of these
+    __slots__ = ('target', 'sources', 'forced_operand')
+
+    CHAINMODE = _CHAINMODE                     # sentinel for forced_operand
 
     # a complete dictionary of possible operations and their symbol
     # useful for pretty-printing etc
-    OPSYMS = {operator.add: "+",
-              operator.sub: "-",
-              operator.mul: "*",
-              operator.floordiv: "/"}
+    OPSYMS = {_ADD: "+",
+              _SUB: "-",
+              _MUL: "*",
+              _DIV: "/"}
 
     def __init__(self, target, *sources, forced_operand=None):
         """Initialize a NYT Digits Puzzle.
@@ -58,19 +150,21 @@ class DigitsPuzzle:
         self.target = target
         self.forced_operand = forced_operand
 
-        # keeping sources in descending order simplifies move generator
-        self.sources = sorted(sources, reverse=True)
+        # Sources are kept in ascending order. That simplifies the move
+        # generator (which walks them in reverse so each pair is a >= b)
+        # and moves, which can find/remove/insert values using bisect.
+        self.sources = sorted(sources)
 
         # sanity check - no non-positive values allowed
-        # NOTE: they are sorted, so checking the last (smallest) suffices
-        if self.sources[-1] <= 0:
+        # NOTE: they are sorted, so checking the first (smallest) suffices
+        if self.sources[0] <= 0:
             raise ValueError(
-                f"illegal (non-positive) source value ({self.sources[-1]})")
+                f"illegal (non-positive) source value ({self.sources[0]})")
 
     def chainmode(self, v, /):
         """Change puzzle chain mode to True/False."""
         if v:
-            self.forced_operand = self.CHAINMODE
+            self.forced_operand = _CHAINMODE
         else:
             self.forced_operand = None
 
@@ -78,89 +172,163 @@ class DigitsPuzzle:
     def endstate(self):
         return self.target in self.sources
 
+    def heuristic(self):
+        """Return a lower bound on moves needed to solve; None if impossible.
+
+        There is no useful bound beyond "at least one more move" but this
+        quickly detects many dead ends: combining a and b never makes more
+        than (a+1)*(b+1) - 1, so the product of (s+1) over all sources can
+        never go up and every value that can ever appear is less than it.
+        """
+        if self.endstate:
+            return 0
+        if len(self.sources) < 2:
+            return None
+
+        bound = 1
+        for v in self.sources:
+            bound *= v + 1
+            if bound > self.target:
+                return 1
+        return None
+
     def clone(self):
-        return self.__class__(self.target, *self.sources,
-                              forced_operand=self.forced_operand)
+        # Bypasses __init__ because there is no need to sort or check
+        # the sources again. NOTE: sources must be copied, not shared,
+        # because moves modify it in place.
+        c = self.__class__.__new__(self.__class__)
+        c.target = self.target
+        c.sources = self.sources.copy()
+        c.forced_operand = self.forced_operand
+        return c
 
     def _sourcecombos(self):
         """Generate potential pairs, taking chain mode into account."""
 
-        # NOTE: See discussion in legalmoves regarding ordering within tuples.
+        # NOTE: See _legal_moves_impl regarding ordering within tuples.
+        # forced_operand is a public attribute, so this is decided on every
+        # call rather than remembered.
         if self.forced_operand in self.sources:
-            # Because forced_operand is being, ummm, forced, it's important
-            # not to double-use it from sources. But there's a catch: there
-            # might be more than one entry in sources equal to this value.
-            # So: can't just test "b != forced_operand" ... have to take
-            # ONE forced_operand value out of the sources and then pair up.
-
-            # this chains together a takewhile that takes from g up until
-            # encountering a forced_operand (which is omitted if so), and
-            # then the remainder of g (if any) after that.  Yeehah!
-            g = iter(self.sources)
-            return (
-                (self.forced_operand, b) for b in
-                itertools.chain(
-                    itertools.takewhile(lambda x: x != self.forced_operand, g),
-                    g))
+            return self._sc_forced()
         else:
-            return itertools.combinations(self.sources, 2)
+            return itertools.combinations(reversed(self.sources), 2)
+
+    def _sc_forced(self):
+        # Because forced_operand is being, ummm, forced, it's important
+        # not to double-use it from sources. But there's a catch: there
+        # might be more than one entry in sources equal to this value.
+        # So: can't just test "b != forced_operand" ... have to take
+        # ONE forced_operand value out of the sources and then pair up.
+        # Since sources are sorted, bisect finds one to omit.
+        f = self.forced_operand
+        s = self.sources
+        i = bisect.bisect_left(s, f)
+        return [(f, b) for b in
+                itertools.chain(reversed(s[i+1:]), reversed(s[:i]))]
 
     def legalmoves(self):
-        """Generate all legal moves. A move is a tuple (op, (a, b))."""
-
-        # _sourcecombos returns (a, b) pairs where either:
-        #     a >= b
-        # OR  a is a "forced operand" and must be the first operand.
-        #
-        # Thus, operand "b" is as small as it *CAN* be, which simplifies
-        # some of the operation filter tests.
-
-        # ADD: all operations are legal - no filtering at all.
-        yield from ((operator.add, ab) for ab in self._sourcecombos())
-
-        # SUB: Do not allow negative (duh) or zero.
-        yield from ((operator.sub, (a, b))
-                    for a, b in self._sourcecombos() if a > b)
-
-        # MUL: Filter out 1 as a minor optimization (search reduction).
-        #      NOTE: Allows 'a' to be 1 if it was the forced operand.
-        yield from ((operator.mul, (a, b))
-                    for a, b in self._sourcecombos() if b != 1)
-
-        # DIV: Has to be evenly divisible and optimize out divide-by-1
-        yield from ((operator.floordiv, (a, b))
-                    for a, b in self._sourcecombos()
-                    if (a % b) == 0 and b != 1)
+        """Return a list of all legal moves. See _legal_moves_impl."""
+        return _legal_moves_impl(self._sourcecombos())
 
     def move(self, m):
         """Perform a move. Moves are tuples (op, (operands-iterable))."""
+        self.apply(m)
+        return self
+
+    def apply(self, m):
+        """Perform a move in place, returning a token for undo()."""
         op, operands = m
-        for x in operands:
-            self.sources.remove(x)
         rslt = op(*operands)
 
         # zero and negative results are not allowed into the puzzle
         if rslt <= 0:
             raise ValueError(f"illegal move: {m}")
 
+        for x in operands:
+            _remove(self.sources, x)
+
         # in chain mode, this must be the next first operand
+        prev_forced = self.forced_operand
         if self.forced_operand:
             self.forced_operand = rslt
-        self.sources = sorted(self.sources + [rslt], reverse=True)
-        return self
+
+        # sources is already in order; just slot rslt into it
+        bisect.insort(self.sources, rslt)
+        return (operands, rslt, prev_forced)
+
+    def undo(self, token):
+        """Reverse a move previously performed by apply()."""
+        operands, rslt, prev_forced = token
+        _remove(self.sources, rslt)
+        for x in operands:
+            bisect.insort(self.sources, x)
+        self.forced_operand = prev_forced
 
     def copy_and_move(self, m):
         return self.clone().move(m)
 
     def canonicalstate(self):
-        """Return hashable object corresponding to the puzzle state."""
-        return tuple(self.sources + [self.forced_operand])
+        """Return hashable object corresponding to the puzzle state.
+
+        Normally this is an int: the (sorted, so order doesn't matter)
+        sources packed _PACKBITS each, then the forced_operand. That
+        makes hashing and comparing states a single integer operation.
+        If any value is too big for that, it is a tuple instead.
+        """
+        return _statekey(self.sources, self.forced_operand)
+
+    def peek_state(self, m):
+        """Return the canonicalstate() that move m WOULD produce.
+
+        The puzzle itself is not modified. This lets the solver discard
+        moves leading to already-seen states without performing them.
+        """
+        op, operands = m
+        rslt = op(*operands)
+        f = rslt if self.forced_operand else self.forced_operand
+
+        if rslt >= _PACKLIMIT or self.sources[-1] >= _PACKLIMIT:
+            # not packable; do it the simple way
+            sources = self.sources.copy()
+            for x in operands:
+                _remove(sources, x)
+            bisect.insort(sources, rslt)
+            return _statekey(sources, f)
+
+        # Otherwise, in ONE pass over the (sorted) sources, and without
+        # making the new sources list, pack the same key _statekey would:
+        # skipping (one each of) the operands and merging in rslt.
+        a, b = operands
+        r = rslt
+        k = 0
+        for v in self.sources:
+            if v == a:
+                a = None
+                continue
+            if v == b:
+                b = None
+                continue
+            if r is not None and r <= v:
+                k = (k << _PACKBITS) | r
+                r = None
+            k = (k << _PACKBITS) | v
+        if r is not None:
+            k = (k << _PACKBITS) | r
+
+        k <<= 2 * _PACKBITS
+        if f is not None:
+            k |= _PACK_FORCED | f
+        return k
 
 
 if __name__ == "__main__":
     import argparse
     from puzzlesolver import PuzzleSolver
 
+    def printmoves(moves, opsyms=DigitsPuzzle.OPSYMS):
+        for op, rands in moves:
+            print(f"{opsyms.get(op, str(op))} {rands}")
+
     def cmdmain():
         parser = argparse.ArgumentParser()
 
@@ -169,33 +337,37 @@ if __name__ == "__main__":
                             const=DigitsPuzzle.CHAINMODE)
         parser.add_argument('-A', '--all',
                             action='store_true')
+        parser.add_argument('-j', '--jit',
+                            action='store_true')
         parser.add_argument('target', type=int)
         parser.add_argument('values', type=int, nargs='+')
         args = parser.parse_args()
 
         d = DigitsPuzzle(args.target, *args.values,
                          forced_operand=args.chainmode)
-        ps = PuzzleSolver()
         n = 1
         if args.all:
             n = -1
+        if args.jit:
+            if n != 1:
+                parser.error("--jit cannot be used with --all")
+            from digits_nb import DigitsSolver   # requires numba
+            ps = DigitsSolver()
+        else:
+            ps = PuzzleSolver()
         moves = ps.solve(d, n=n)
 
         if not moves:
             print("No solution found")
         else:
             if n == 1:
-                for op, rands in moves:
-                    opstr = DigitsPuzzle.OPSYMS.get(op, str(op))
-                    print(f"{opstr} {rands}")
+                printmoves(moves)
             else:
                 solutions = moves
                 print(f"Found {len(solutions)} solutions.")
                 for ith, moves in enumerate(solutions):
                     print(f"Solution #{ith+1}")
-                    for op, rands in moves:
-                        opstr = DigitsPuzzle.OPSYMS.get(op, str(op))
-                        print(f"{opstr} {rands}")
+                    printmoves(moves)
         print(ps.stats)
 
     cmdmain()
@@ -147,6 +147,111 @@ class TestMethods(unittest.TestCase):
                 with self.assertRaises(ValueError):
                     d.move(m)
 
+    def test9(self):
+        # canonical state tests. Different move orders arriving at the
+        # same sources must be the same state; duplicated values must
+        # not cancel each other out.
+        d1 = DigitsPuzzle(10, 3, 4, 5, 6)
+        d1.move((operator.add, (5, 3)))
+        d1.move((operator.mul, (6, 4)))
+
+        d2 = DigitsPuzzle(10, 3, 4, 5, 6)
+        d2.move((operator.mul, (6, 4)))
+        d2.move((operator.add, (5, 3)))
+        self.assertEqual(d1.canonicalstate(), d2.canonicalstate())
+        self.assertEqual(d1.canonicalstate(),
+                         DigitsPuzzle(10, 24, 8).canonicalstate())
+
+        self.assertNotEqual(DigitsPuzzle(10, 7, 7, 3).canonicalstate(),
+                            DigitsPuzzle(10, 3).canonicalstate())
+        self.assertNotEqual(
+            DigitsPuzzle(10, 7, 3).canonicalstate(),
+            DigitsPuzzle(10, 7, 3,
+                         forced_operand=DigitsPuzzle.CHAINMODE
+                         ).canonicalstate())
+
+        # values too big to be packed into an integer state
+        self.assertEqual(DigitsPuzzle(10, 7, 5000).canonicalstate(),
+                         DigitsPuzzle(10, 5000, 7).canonicalstate())
+        self.assertNotEqual(DigitsPuzzle(10, 7, 5000).canonicalstate(),
+                            DigitsPuzzle(10, 7, 5001).canonicalstate())
+
+    def test10(self):
+        # apply/undo must restore the puzzle exactly
+        d = DigitsPuzzle(10, 3, 14, 2, 7,
+                         forced_operand=DigitsPuzzle.CHAINMODE)
+        start = (list(d.sources), d.forced_operand, d.canonicalstate())
+        t1 = d.apply((operator.floordiv, (14, 2)))
+        t2 = d.apply((operator.add, (7, 7)))
+        self.assertEqual(d.forced_operand, 14)
+        self.assertNotEqual(d.canonicalstate(), start[2])
+        d.undo(t2)
+        d.undo(t1)
+        self.assertEqual((d.sources, d.forced_operand, d.canonicalstate()),
+                         start)
+
+    def test11(self):
+        # peek_state must predict canonicalstate after each move,
+        # and must not change the puzzle.
+        for fo in (None, DigitsPuzzle.CHAINMODE):
+            d = DigitsPuzzle(10, 3, 14, 2, 7, 7, 900, forced_operand=fo)
+            start = d.canonicalstate()
+            for m in d.legalmoves():
+                with self.subTest(fo=fo, m=m):
+                    self.assertEqual(d.peek_state(m),
+                                     d.copy_and_move(m).canonicalstate())
+                    self.assertEqual(d.canonicalstate(), start)
+
+    def test12(self):
+        # heuristic: 0 if solved, None for provable dead ends, else 1
+        self.assertEqual(DigitsPuzzle(10, 3, 10).heuristic(), 0)
+        self.assertEqual(DigitsPuzzle(19, 3, 4).heuristic(), 1)
+        self.assertIsNone(DigitsPuzzle(20, 3, 4).heuristic())
+        self.assertIsNone(DigitsPuzzle(5, 7).heuristic())
+
+    def test13(self):
+        # all the solver strategies must agree on the shortest solution
+        # (and on its existence)
+        from puzzlesolver import PuzzleSolver
+        ps = PuzzleSolver()
+        for target, sources, fo in (
+                (123, (5, 9, 10, 14, 19, 21), None),
+                (123, (5, 9, 10, 14, 19, 21), DigitsPuzzle.CHAINMODE),
+                (449, (1, 1, 2, 3, 4, 25), DigitsPuzzle.CHAINMODE),
+                (9973, (2, 3, 5), None)):
+            lengths = set()
+            for strategy in PuzzleSolver.STRATEGIES:
+                d = DigitsPuzzle(target, *sources, forced_operand=fo)
+                s = ps.solve(d, strategy=strategy)
+                lengths.add(None if s is None else len(s))
+            with self.subTest(target=target, sources=sources, fo=fo):
+                self.assertEqual(len(lengths), 1)
+
+    def test14(self):
+        # a clone is equal to, but independent of, the original
+        d = DigitsPuzzle(10, 3, 14, 2, 7,
+                         forced_operand=DigitsPuzzle.CHAINMODE)
+        c = d.clone()
+        self.assertEqual(c.canonicalstate(), d.canonicalstate())
+        self.assertEqual(c.target, d.target)
+        c.move((operator.floordiv, (14, 2)))
+        self.assertEqual(sorted(d.sources), [2, 3, 7, 14])
+        self.assertIs(d.forced_operand, DigitsPuzzle.CHAINMODE)
+        self.assertEqual(sorted(c.sources), [3, 7, 7])
+        self.assertEqual(c.forced_operand, 7)
+
+    def test15(self):
+        # forced_operand is a plain attribute; setting it directly must
+        # take effect just as if it had been given to the constructor.
+        d = DigitsPuzzle(10, 3, 14, 2, 7)
+        self.assertEqual(len(list(d.legalmoves())), 20)
+        d.forced_operand = 7
+        moves = list(d.legalmoves())
+        self.assertEqual(len(moves), 8)
+        self.assertTrue(all(rands[0] == 7 for op, rands in moves))
+        d2 = DigitsPuzzle(10, 3, 14, 2, 7, forced_operand=7)
+        self.assertEqual(list(d2.legalmoves()), moves)
+
 
 if __name__ == "__main__":
     unittest.main()
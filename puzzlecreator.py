@@ -1,5 +1,6 @@
 import random
 import itertools
+import multiprocessing
 
 from nytdigits import DigitsPuzzle
 from puzzlesolver import PuzzleSolver
@@ -7,10 +8,35 @@ from puzzlesolver import PuzzleSolver
 DEFAULT_SOURCES = range(1, 26)        # based on observations of NYT
 DEFAULT_TARGETS = range(50, 450)      # based on observations of NYT
 
+# puzzle_maker remembers (at most) this many draws, to skip repeats
+_SEEN_MAX = 1 << 16
+
+# One solver, reused for every attempt (in each process). Solvers keep no
+# per-puzzle state between solves.
+_solver = PuzzleSolver()
+
+
+def _try_one(attempt):
+    """Return attempt if its puzzle meets the criteria, else None.
+
+    attempt is a tuple: (target, sources, chainmode, minsteps, reqds)
+    This is at module level so that it can be run in worker processes.
+    """
+    target, sources, chainmode, minsteps, reqds = attempt
+    z = DigitsPuzzle(target, *sources)
+    z.chainmode(chainmode)
+    _solver.reset()
+    soln = _solver.solve(z)
+    if soln is not None and len(soln) >= minsteps:
+        soln_ops = {op for op, rands in soln}
+        if (soln_ops & reqds) == reqds:
+            return attempt
+    return None
+
 
 def puzzle_maker(*, minsteps=3, chainmode=True,
                  targets=None, sources=None, puzzle_size=6,
-                 required_ops=None, attempt_limit=None):
+                 required_ops=None, attempt_limit=None, workers=1):
     """Make a NYTimes Digits puzzle meeting various criteria.
 
     minsteps: Default = 3
@@ -44,6 +70,15 @@ def puzzle_maker(*, minsteps=3, chainmode=True,
     attempt_limit: Default None
         The number of times to loop trying to find a puzzle that meets
         all the criteria. Loops forever if default.
+
+    workers: Default 1
+        How many processes to use to try puzzles in parallel.
+        If 1, everything is done in this process. If None, one per CPU.
+        A pool of worker processes is only worth its startup cost when
+        many attempts are likely to be needed.
+        Attempts are made (randomly) in the same order regardless, and the
+        first one meeting the criteria is returned; so for a given random
+        seed the resulting puzzle does not depend on the number of workers.
     """
 
     try:
@@ -64,18 +99,52 @@ def puzzle_maker(*, minsteps=3, chainmode=True,
     else:
         reqds = set(required_ops)
 
-    for attempt in itertools.count():
-        if attempt_limit is not None and attempt >= attempt_limit:
-            return None
-
-        z = DigitsPuzzle(random.choice(targets),
-                         *random.sample(sources, puzzle_size))
-        z.chainmode(chainmode)
-        soln = PuzzleSolver().solve(z)
-        if soln is not None and len(soln) >= minsteps:
-            soln_ops = {op for op, rands in soln}
-            if (soln_ops & reqds) == reqds:
-                return z
+    # Many random draws are just permutations of previous ones (or exact
+    # repeats); those still count as attempts but are not solved again.
+    # So that looping forever does not grow this forever, it is simply
+    # emptied when it gets too big (at worst, re-solving some repeats).
+    def _attempts():
+        seen = set()
+        for attempt in itertools.count():
+            if attempt_limit is not None and attempt >= attempt_limit:
+                return
+            target = random.choice(targets)
+            srcs = tuple(sorted(random.sample(sources, puzzle_size)))
+            if (target, srcs) not in seen:
+                if len(seen) >= _SEEN_MAX:
+                    seen.clear()
+                seen.add((target, srcs))
+                yield (target, srcs, chainmode, minsteps, reqds)
+
+    if workers is None:
+        workers = multiprocessing.cpu_count()
+
+    if workers == 1:
+        results = map(_try_one, _attempts())
+        found = next((a for a in results if a is not None), None)
+    else:
+        # Attempts are handed out in batches because the pool would
+        # otherwise consume the (potentially infinite) generator eagerly.
+        # Results come back in order, making this deterministic.
+        found = None
+        batchsize = 4 * workers
+        attempts = _attempts()
+        with multiprocessing.Pool(workers) as pool:
+            while found is None:
+                batch = list(itertools.islice(attempts, batchsize))
+                if not batch:
+                    break
+                for a in pool.imap(_try_one, batch):
+                    if a is not None:
+                        found = a
+                        break
+
+    if found is None:
+        return None
+    target, sources, *_ = found
+    z = DigitsPuzzle(target, *sources)
+    z.chainmode(chainmode)
+    return z
 
 
 if __name__ == "__main__":
@@ -22,20 +22,49 @@
 
 # Generic framework for searching puzzle solution spaces.
 
+import heapq
 import itertools
-from collections import namedtuple
+from collections import namedtuple, deque
+
+
+# Move trails in the search queues are linked lists: (move, parent) tuples,
+# with None for the (empty) trail of the starting puzzle. Extending a trail
+# is then O(1) (and shares the parent trail) rather than copying a list;
+# trails are only converted to lists for solutions.
+def _movelist(trail):
+    """Convert a linked (move, parent) trail into a list of moves."""
+    moves = []
+    while trail is not None:
+        move, trail = trail
+        moves.append(move)
+    moves.reverse()
+    return moves
 
 
 class PuzzleSolver:
     """ps = PuzzleSolver()
 
        ps.solve(puzzle) - return a move sequence, or None, to solve puzzle.
+       ps.solve_iddfs(puzzle, max_depth=8)
+                        - same, using the iterative-deepening search but
+                          only looking for solutions up to max_depth moves
        ps.stats         - miscellaneous statistics, only valid after solve()
+       ps.reset()       - clear the statistics
+
+    In the statistics, maxq is the largest the search queue got for the
+    'bfs' and 'astar' strategies. The 'iddfs' strategy has no queue; for
+    it maxq is instead the deepest (in moves) the search went.
+
+    A PuzzleSolver can be reused for any number of puzzles. It keeps no
+    state from one solve() to the next (other than the statistics).
     """
 
     STATS = namedtuple('PuzzleStatistics', ['maxq', 'iterations'])
 
-    def _solve(self, puzzle):
+    # search strategies; see _solve
+    STRATEGIES = ('bfs', 'iddfs', 'astar')
+
+    def _solve(self, puzzle, strategy=None):
         """Arbitrary puzzle search/solver. This is the GENERATOR.
 
         Returns a list of moves which is a puzzle solution, or None.
@@ -94,8 +123,63 @@ class PuzzleSolver:
         A poor implementation of #3 (or not even trying) will still work;
         however the solver will end up exploring extra search spaces that
         are functionally identical (i.e., solving will take longer).
+
+        OPTIONAL IN-PLACE MOVES:
+        If the puzzle also has these methods:
+
+        token = puzzle.apply(m)        -- perform move 'm' on the puzzle
+                                          itself; return an opaque token.
+
+        puzzle.undo(token)             -- reverse the apply() that returned
+                                          token, restoring the prior state.
+
+        then the 'iddfs' strategy (see _solve_iddfs) can be used. It finds
+        the same solutions but does not need to make a copy of the puzzle
+        for every move, so it uses far less memory (though it is usually
+        slower). The puzzle object is modified during the search, and
+        restored when the search ends.
+
+        OPTIONAL STATE PEEKING:
+        s = puzzle.peek_state(m)       -- return the canonicalstate() the
+                                          puzzle would have after move 'm',
+                                          without changing the puzzle.
+
+        If present, the solver uses this to skip moves that lead to already
+        explored states without copying the puzzle (or applying the move).
+
+        OPTIONAL HEURISTIC:
+        h = puzzle.heuristic()         -- return a lower bound on the number
+                                          of moves still needed to solve the
+                                          puzzle, or None if it provably
+                                          cannot be solved.
+
+        The bound must never overestimate, and must be consistent: making
+        any one move cannot lower it by more than 1. Every search strategy
+        uses a None result to prune dead ends. The 'astar' strategy also
+        uses the bound itself to explore more promising states first.
+
+        STRATEGY:
+          'bfs'   -- breadth-first search. Requires copy_and_move.
+          'iddfs' -- iterative-deepening depth-first search.
+                     Requires apply/undo.
+          'astar' -- best-first (A*) search, ordered by moves so far plus
+                     the heuristic (0 if the puzzle has none).
+                     Requires copy_and_move.
+          None    -- (default) 'bfs'. The others are only used if
+                     explicitly requested.
+
+        All strategies find the solutions with the fewest moves first.
         """
 
+        if strategy is None:
+            strategy = 'bfs'
+        if strategy not in self.STRATEGIES:
+            raise ValueError(f"unknown search strategy '{strategy}'")
+        return getattr(self, '_solve_' + strategy)(puzzle)
+
+    def _solve_bfs(self, puzzle):
+        """Breadth-first search; see _solve for details."""
+
         #
         # This performs a breadth-first search.
         #
@@ -110,37 +194,205 @@ class PuzzleSolver:
         #
 
         statetrail = {puzzle.canonicalstate()}
+        peeking = hasattr(puzzle, 'peek_state')
+        pruning = hasattr(puzzle, 'heuristic')
+
+        self._maxq = 0
+        q = deque([(puzzle, None)])     # state queue: [(puzzle, trail), ...]
+        for self._iterations in itertools.count(1):
+            try:
+                z, movetrail = q.popleft()
+            except IndexError:
+                # no solution was found
+                return
+
+            for move in z.legalmoves():
+                if peeking:
+                    z2state = z.peek_state(move)
+                    if z2state in statetrail:
+                        continue
+                    z2 = z.copy_and_move(move)
+                else:
+                    z2 = z.copy_and_move(move)
+                    z2state = z2.canonicalstate()
+                    if z2state in statetrail:
+                        continue
+                if z2.endstate:
+                    yield _movelist((move, movetrail))
+                else:
+                    statetrail.add(z2state)
+                    if pruning and z2.heuristic() is None:
+                        continue
+                    q.append((z2, (move, movetrail)))
+                    self._maxq = max(self._maxq, len(q))
+
+    def _solve_iddfs(self, puzzle, max_depth=None):
+        """Iterative-deepening depth-first search; see _solve for details.
+
+        Each iteration is a depth-first search that goes one move deeper
+        than the previous and only generates solutions of exactly that many
+        moves. Thus, as with the breadth-first search, the solution with the
+        fewest moves is found first. If max_depth is given, solutions
+        longer than that are not searched for.
+
+        Unlike the breadth-first search, nothing is queued: only the move
+        trail of the current path is kept (along with depths, below). So
+        peak memory is far smaller, which matters for deeper puzzles.
+
+        depths: maps canonical states to the fewest moves needed to reach
+                them. It is exact (by the end of an iteration) for every
+                state at or above that iteration's depth limit, and is used
+                to explore each state only via a shortest path to it
+                (and only once in each iteration). As a result this finds
+                exactly the same set of solutions as the breadth-first search.
+        """
+
+        depths = {puzzle.canonicalstate(): 0}
+        movetrail = []
+
+        # these are called a LOT; avoid repeated attribute lookups
+        apply = puzzle.apply
+        undo = puzzle.undo
+        canonicalstate = puzzle.canonicalstate
+        peek_state = getattr(puzzle, 'peek_state', None)
+        heuristic = getattr(puzzle, 'heuristic', None)
+
+        self._maxq = 0          # for this search: the deepest it went
+        self._iterations = 0
+
+        def _dfs(depth, limit, expanded):
+            nonlocal newstates
+            self._iterations += 1
+            self._maxq = max(self._maxq, depth)
+            # Peeking is pointless at the depth limit: (almost) every
+            # child there is new and has to be applied anyway to see if
+            # it is an endstate.
+            peeking = peek_state is not None and depth + 1 < limit
+            for move in puzzle.legalmoves():
+                if peeking:
+                    zstate = peek_state(move)
+                    d = depths.get(zstate)
+                    if d is not None and (d <= depth or zstate in expanded):
+                        continue
+                    token = apply(move)
+                else:
+                    token = apply(move)
+                    zstate = canonicalstate()
+                    d = depths.get(zstate)
+                    if d is not None and (d <= depth or zstate in expanded):
+                        undo(token)
+                        continue
+                try:
+                    movetrail.append(move)
+                    if puzzle.endstate:
+                        if depth + 1 == limit:
+                            yield list(movetrail)
+                    elif heuristic is not None and heuristic() is None:
+                        pass            # dead end
+                    elif depth + 1 < limit:
+                        expanded.add(zstate)
+                        yield from _dfs(depth + 1, limit, expanded)
+                    elif d is None:
+                        depths[zstate] = limit
+                        newstates = True
+                    movetrail.pop()
+                finally:
+                    undo(token)
+
+        if max_depth is None:
+            limits = itertools.count(1)
+        else:
+            limits = range(1, max_depth + 1)
+        for limit in limits:
+            # if the previous iteration found no new states at its depth
+            # limit then there is nothing more to explore
+            newstates = False
+            yield from _dfs(0, limit, set())
+            if not newstates:
+                return
+
+    def _solve_astar(self, puzzle):
+        """Best-first (A*) search; see _solve for details.
+
+        The priority queue is ordered by f = g + h where g is the number of
+        moves made so far and h is the puzzle's heuristic(). Ties are broken
+        first-come first-served, so with no heuristic this is a BFS.
+        Solutions are queued like any other state, and generated when they
+        come out of the queue; since h is consistent they come out in order
+        of increasing length.
+
+        best: maps canonical states to the fewest moves found (so far) to
+              reach them. A state is only queued again if reached in fewer
+              moves; a queue entry superseded that way is ignored.
+        """
+
+        peeking = hasattr(puzzle, 'peek_state')
+        hashints = hasattr(puzzle, 'heuristic')
+
+        zstate = puzzle.canonicalstate()
+        best = {zstate: 0}
+        tiebreak = itertools.count()
 
         self._maxq = 0
-        q = [(puzzle, [])]      # state queue: [(puzzle, trail), ...]
+        # queue entries: (f, tiebreak, g, puzzle, state, trail)
+        q = [(0, next(tiebreak), 0, puzzle, zstate, None)]
         for self._iterations in itertools.count(1):
             try:
-                z, movetrail = q.pop(0)
+                _, _, g, z, zstate, movetrail = heapq.heappop(q)
             except IndexError:
                 # no solution was found
                 return
 
+            if g and z.endstate:
+                yield _movelist(movetrail)
+                continue
+            if best[zstate] < g:
+                continue            # superseded by a shorter path
+
             for move in z.legalmoves():
-                z2 = z.copy_and_move(move)
-                z2state = z2.canonicalstate()
-                if z2state not in statetrail:
-                    if z2.endstate:
-                        yield movetrail + [move]
-                    else:
-                        statetrail.add(z2state)
-                        q.append((z2, movetrail + [move]))
-                        self._maxq = max(self._maxq, len(q))
-
-    def solve(self, puzzle, n=1):
+                if peeking:
+                    z2state = z.peek_state(move)
+                    if best.get(z2state, g + 2) <= g + 1:
+                        continue
+                    z2 = z.copy_and_move(move)
+                else:
+                    z2 = z.copy_and_move(move)
+                    z2state = z2.canonicalstate()
+                    if best.get(z2state, g + 2) <= g + 1:
+                        continue
+
+                h = z2.heuristic() if hashints else 0
+                if h is None:
+                    continue        # dead end
+                if not z2.endstate:
+                    best[z2state] = g + 1
+                heapq.heappush(q, (g + 1 + h, next(tiebreak), g + 1,
+                                   z2, z2state, (move, movetrail)))
+                self._maxq = max(self._maxq, len(q))
+
+    def solve(self, puzzle, n=1, *, strategy=None):
         """Solve the puzzle, return n solutions (by default: 1)
 
         If n <= 0 then return ALL solutions.
         If n == 1 return the first ("best") solution
         If n > 1 return n solutions a sequences of up to n solutions;
                  there might be fewer of course.
+
+        strategy: the search algorithm to use. See _solve.
+        """
+
+        return self._solutions(self._solve(puzzle, strategy), n)
+
+    def solve_iddfs(self, puzzle, max_depth=8):
+        """Return the first ("best") solution of at most max_depth moves.
+
+        Returns None if there is no such solution. This always uses the
+        iterative-deepening search and so requires apply/undo (see _solve).
         """
+        return self._solutions(self._solve_iddfs(puzzle, max_depth), 1)
 
-        g = self._solve(puzzle)
+    def _solutions(self, g, n):
+        """Collect n solutions from search generator g. See solve()."""
         solutions = []
         if n <= 0:
             counter = itertools.count()
@@ -152,6 +404,7 @@ class PuzzleSolver:
             except StopIteration:
                 break
             solutions.append(sol)
+        g.close()
 
         if n == 1:
             if len(solutions) == 1:
@@ -161,6 +414,11 @@ class PuzzleSolver:
         else:
             return solutions             # return the list
 
+    def reset(self):
+        """Clear the statistics (as if no solve() had been done)."""
+        self._maxq = 0
+        self._iterations = 0
+
     @property
     def stats(self):
         """miscellaneous statistics attribute."""
@@ -210,6 +468,23 @@ if __name__ == "__main__":
         def endstate(self):
             return len(self.pins[-1]) == self.ndiscs
 
+    class InPlaceTowerOfHanoi(TowerOfHanoi):
+        """Same puzzle, but also with the optional in-place interface."""
+
+        def apply(self, sndn):
+            self.move(sndn)
+            return sndn
+
+        def undo(self, sndn):
+            sn, dn = sndn
+            self.pins[sn].append(self.pins[dn].pop())
+
+    class PeekingTowerOfHanoi(TowerOfHanoi):
+        """Same puzzle, but also with the optional peek_state()."""
+
+        def peek_state(self, sndn):
+            return self.clone().move(sndn).canonicalstate()
+
     class TestMethods(unittest.TestCase):
         def test1(self):
             ps = PuzzleSolver()
@@ -227,4 +502,52 @@ if __name__ == "__main__":
                     self.assertTrue(ps.stats.iterations > difficulty)
                     difficulty = ps.stats.iterations
 
+            ps.reset()
+            self.assertEqual(ps.stats, PuzzleSolver.STATS(0, 0))
+
+        def test2(self):
+            # the depth-first search should find the same solutions
+            # as the breadth-first search, and restore the puzzle.
+            ps = PuzzleSolver()
+            for puzzlesize in range(1, 5):
+                with self.subTest(puzzlesize=puzzlesize):
+                    h = InPlaceTowerOfHanoi(ndiscs=puzzlesize)
+                    start = h.canonicalstate()
+                    s = ps.solve(h, strategy='iddfs')
+                    self.assertEqual(len(s), (2**puzzlesize)-1)
+                    self.assertEqual(h.canonicalstate(), start)
+
+                    bfs = ps.solve(TowerOfHanoi(ndiscs=puzzlesize), n=-1)
+                    dfs = ps.solve(h, n=-1, strategy='iddfs')
+                    peek = ps.solve(PeekingTowerOfHanoi(ndiscs=puzzlesize),
+                                    n=-1)
+                    self.assertEqual([len(m) for m in bfs],
+                                     [len(m) for m in dfs])
+                    self.assertEqual(bfs, peek)
+                    self.assertEqual(h.canonicalstate(), start)
+
+        def test3(self):
+            # every strategy should find equally short solutions
+            ps = PuzzleSolver()
+            for puzzlesize in range(1, 5):
+                for strategy in PuzzleSolver.STRATEGIES:
+                    with self.subTest(puzzlesize=puzzlesize,
+                                      strategy=strategy):
+                        h = InPlaceTowerOfHanoi(ndiscs=puzzlesize)
+                        s = ps.solve(h, strategy=strategy)
+                        self.assertEqual(len(s), (2**puzzlesize)-1)
+
+            with self.assertRaises(ValueError):
+                ps.solve(TowerOfHanoi(), strategy='bogus')
+
+        def test4(self):
+            # depth-limited iterative deepening
+            ps = PuzzleSolver()
+            h = InPlaceTowerOfHanoi(ndiscs=3)
+            start = h.canonicalstate()
+            self.assertIsNone(ps.solve_iddfs(h, max_depth=6))
+            self.assertEqual(len(ps.solve_iddfs(h, max_depth=7)), 7)
+            self.assertEqual(len(ps.solve_iddfs(h, max_depth=20)), 7)
+            self.assertEqual(h.canonicalstate(), start)
+
     unittest.main()